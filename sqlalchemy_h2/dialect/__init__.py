@@ -1,8 +1,9 @@
-from sqlalchemy_h2.dialect import base, zxjdbc
+from sqlalchemy_h2.dialect import base
+from sqlalchemy_h2.dialect.base import BLOB, CLOB
 
-
-# default dialect
-base.dialect = zxjdbc.dialect
+# Connector modules (e.g. sqlalchemy_h2.dialect.zxjdbc) are not imported
+# here; they are loaded through the dialect registry on first create_engine,
+# so H2Dialect and the compilers can be used without any driver installed.
 
 #from sqlalchemy.dialects.h2.base import \
 #    INTEGER, BIGINT, SMALLINT, VARCHAR, CHAR, TEXT, NUMERIC, FLOAT, REAL, INET, \
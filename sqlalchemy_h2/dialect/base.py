@@ -12,8 +12,21 @@ see: http://code.google.com/p/sqlalchemy-jython/
 
 author: adorsk
 
+Large Objects
+-------------
+
+:class:`.BLOB` and :class:`.CLOB` bind from file-like objects or iterators
+of chunks as well as plain strings, and return file-like readers so that
+large values are never materialized at once.  Readers produced by a
+streaming driver are only valid while the transaction that fetched them is
+open.  Streaming is opt-in by type: reflected BLOB/CLOB columns, generic
+:class:`~sqlalchemy.types.LargeBinary`/:class:`~sqlalchemy.types.Text`
+columns and untyped statements still fetch plain strings.
+
 """
 
+import array
+import io
 import re
 
 from sqlalchemy import sql
@@ -25,6 +38,124 @@ from sqlalchemy.sql import case, cast
 from sqlalchemy.sql import compiler
 
 
+class LOBSource(object):
+    """Read-only file-like view over a LOB value being bound.
+
+    Wraps either a file-like object or an iterable of string chunks so that
+    connectors can pull the value through :meth:`read` a chunk at a time.
+    """
+
+    def __init__(self, value, empty=''):
+        self.empty = empty
+        if hasattr(value, 'read'):
+            self._file = value
+        else:
+            self._file = None
+            self._chunks = iter(value)
+            self._buffer = empty
+            self._pos = 0
+
+    def read(self, size=-1):
+        if self._file is not None:
+            return self._file.read(size)
+
+        # _pos is the read offset into the current chunk, so each
+        # character is copied once however small the reads are.
+        parts = []
+        remaining = size
+        while size < 0 or remaining > 0:
+            if self._pos >= len(self._buffer):
+                try:
+                    self._buffer = self._chunks.next()
+                except StopIteration:
+                    self._buffer = self.empty
+                    self._pos = 0
+                    break
+                self._pos = 0
+                continue
+            if size < 0:
+                end = len(self._buffer)
+            else:
+                end = min(self._pos + remaining, len(self._buffer))
+                remaining -= end - self._pos
+            if self._pos == 0 and end == len(self._buffer):
+                parts.append(self._buffer)
+            else:
+                parts.append(self._buffer[self._pos:end])
+            self._pos = end
+        if len(parts) == 1:
+            return parts[0]
+        return self.empty.join(parts)
+
+
+def _is_lob_stream(value):
+    """True for file-like objects and chunk iterators such as generators.
+
+    Other iterables (``array.array``, ``buffer``, lists...) are values, not
+    streams.
+    """
+    if isinstance(value, array.array):
+        # array.array has a read() method (an alias of fromfile)
+        return False
+    if hasattr(value, 'read'):
+        return True
+    try:
+        return iter(value) is value
+    except TypeError:
+        return False
+
+
+class _LOBMixin(object):
+    def _wrap_bind(self, value, process):
+        if value is not None and _is_lob_stream(value):
+            return LOBSource(value, empty=self.empty)
+        if process:
+            return process(value)
+        return value
+
+    def bind_processor(self, dialect):
+        process = super(_LOBMixin, self).bind_processor(dialect)
+
+        def process_lob(value):
+            return self._wrap_bind(value, process)
+        return process_lob
+
+    def result_processor(self, dialect, coltype):
+        process = super(_LOBMixin, self).result_processor(dialect, coltype)
+
+        def process_lob(value):
+            if value is None or hasattr(value, 'read'):
+                return value
+            if process:
+                value = process(value)
+            return self._reader(value, dialect)
+        return process_lob
+
+    def _reader(self, value, dialect):
+        return self.reader_cls(value)
+
+
+class BLOB(_LOBMixin, sqltypes.BLOB):
+    """H2 BLOB; binds from file-like objects or iterators and fetches as
+    a file-like reader."""
+
+    empty = ''
+    reader_cls = io.BytesIO
+
+
+class CLOB(_LOBMixin, sqltypes.CLOB):
+    """H2 CLOB; binds from file-like objects or iterators and fetches as
+    a file-like reader."""
+
+    empty = u''
+    reader_cls = io.StringIO
+
+    def _reader(self, value, dialect):
+        if isinstance(value, str):
+            value = value.decode(dialect.encoding)
+        return self.reader_cls(value)
+
+
 class H2Compiler(compiler.SQLCompiler):
     extract_map = compiler.SQLCompiler.extract_map.copy()
 
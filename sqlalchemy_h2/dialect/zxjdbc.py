@@ -12,18 +12,350 @@ Character Sets
 SQLAlchemy zxjdbc dialects pass unicode straight through to the
 zxjdbc/JDBC layer.
 
+Prepared Statement Cache
+------------------------
+
+Statements are prepared once per DBAPI connection and kept in a bounded
+LRU cache keyed by SQL text, so repeated INSERT/SELECT strings are not
+re-prepared by the JDBC layer on every execute.  The cache size is set with
+the ``statement_cache_size`` argument to :func:`~sqlalchemy.create_engine`
+(default 100, ``0`` disables caching).  The cache is cleared whenever a
+statement starting with a DDL verb (``CREATE``, ``ALTER``, ``DROP``,
+``TRUNCATE``, ``RENAME``, ``COMMENT``, ``GRANT``, ``REVOKE``, ``RUNSCRIPT``,
+``SET SCHEMA`` or ``SET SCHEMA_SEARCH_PATH``, after any leading SQL
+comments) is executed on the connection, and is discarded when the
+underlying DBAPI connection is replaced.  Schema changes made indirectly,
+e.g. from a stored procedure invoked with ``CALL``, are not detected; clear
+the cache by hand with ``get_statement_cache(...).clear()`` after such
+statements.  Counters are available from
+:meth:`H2_zxjdbc.get_statement_cache`::
+
+    cache = engine.dialect.get_statement_cache(conn.connection)
+    cache.hits, cache.misses, cache.evictions
+
+Large Objects
+-------------
+
+Result columns typed as :class:`~sqlalchemy_h2.dialect.base.BLOB` or
+:class:`~sqlalchemy_h2.dialect.base.CLOB` are fetched as
+:class:`.H2LOBReader` objects backed by JDBC
+``getBinaryStream``/``getCharacterStream``, and
+:class:`~sqlalchemy_h2.dialect.base.LOBSource` binds are sent with
+``setBinaryStream``/``setCharacterStream``, so only one chunk of a value is
+held in memory at a time.  Statements that neither select nor bind those
+types, including plain string statements, use zxJDBC's default data
+handler unchanged.
+
 """
 import re
+from collections import OrderedDict
 
 from sqlalchemy import pool
+from sqlalchemy.sql import expression
 from sqlalchemy.connectors.zxJDBC import ZxJDBCConnector
-from sqlalchemy_h2.dialect.base import H2Dialect, H2ExecutionContext
+from sqlalchemy_h2.dialect.base import H2Dialect, H2ExecutionContext, \
+    BLOB, CLOB, LOBSource
+
+
+DDL_RE = re.compile(
+    r'\s*(?:(?:--[^\n]*(?:\n|\Z)|/\*(?:[^*]|\*(?!/))*\*/)\s*)*'
+    r'(?:CREATE|ALTER|DROP|TRUNCATE|RENAME|COMMENT|GRANT|REVOKE|RUNSCRIPT|'
+    r'SET\s+SCHEMA(?:_SEARCH_PATH)?)\b', re.I | re.S)
+
+
+class H2StatementCache(object):
+    """LRU cache of zxJDBC prepared statements for one DBAPI connection."""
+
+    def __init__(self, dbapi_connection, capacity):
+        self.dbapi_connection = dbapi_connection
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._statements = OrderedDict()
+
+    def __len__(self):
+        return len(self._statements)
+
+    def get(self, cursor, statement):
+        """Return the prepared statement for ``statement``, preparing it
+        on ``cursor`` if it is not cached."""
+        try:
+            prepared = self._statements.pop(statement)
+        except KeyError:
+            self.misses += 1
+            prepared = cursor.prepare(statement)
+            while len(self._statements) >= self.capacity:
+                _, evicted = self._statements.popitem(last=False)
+                self._close(evicted)
+                self.evictions += 1
+        else:
+            self.hits += 1
+        self._statements[statement] = prepared
+        return prepared
+
+    def clear(self):
+        """Close and discard all cached statements."""
+        statements = list(self._statements.values())
+        self._statements.clear()
+        for prepared in statements:
+            self._close(prepared)
+
+    def _close(self, prepared):
+        try:
+            prepared.close()
+        except Exception:
+            pass
+
+
+class H2LOBReader(object):
+    """Lazy file-like reader over a JDBC Blob or Clob.
+
+    The JDBC stream is opened on first read and consumed ``chunk_size``
+    units at a time when iterated.  As with Python files, ``read(size)``
+    counts bytes for a Blob and characters for a Clob.
+    """
+
+    chunk_size = 65536
+
+    def __init__(self, lob, binary):
+        self.lob = lob
+        self.binary = binary
+        self._stream = None
+        self.closed = False
+
+    def _open(self):
+        if self.closed:
+            raise ValueError("I/O operation on closed LOB reader")
+        if self._stream is None:
+            if self.binary:
+                self._stream = self.lob.getBinaryStream()
+            else:
+                self._stream = self.lob.getCharacterStream()
+        return self._stream
+
+    def _read_chunk(self, size):
+        import jarray
+        stream = self._open()
+        buf = jarray.zeros(size, self.binary and 'b' or 'c')
+        n = stream.read(buf, 0, size)
+        if n <= 0:
+            return None
+        if self.binary:
+            from org.python.core.util import StringUtil
+            return StringUtil.fromBytes(buf, 0, n)
+
+        from java.lang import Character, String
+        text = String(buf, 0, n)
+        # size counts UTF-16 units; never split a surrogate pair, so the
+        # chunk holds at most ``size`` characters.
+        if Character.isHighSurrogate(buf[n - 1]):
+            low = stream.read()
+            if low >= 0:
+                text = text.concat(String(Character.toChars(low)))
+        return unicode(text)
+
+    def read(self, size=-1):
+        empty = self.binary and '' or u''
+        parts = []
+        while size != 0:
+            if size < 0:
+                chunk = self._read_chunk(self.chunk_size)
+            else:
+                chunk = self._read_chunk(min(size, self.chunk_size))
+            if chunk is None:
+                break
+            parts.append(chunk)
+            if size > 0:
+                size -= len(chunk)
+        return empty.join(parts)
+
+    def __iter__(self):
+        while True:
+            chunk = self._read_chunk(self.chunk_size)
+            if chunk is None:
+                break
+            yield chunk
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        if self._stream is not None:
+            self._stream.close()
+        self.lob.free()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _lob_usage(compiled):
+    """Return the result keys typed as H2 LOBs for a compiled statement,
+    and whether any of its binds are.  Cached on the compiled object."""
+    try:
+        return compiled._h2_lob_usage
+    except AttributeError:
+        pass
+    result_map = getattr(compiled, 'result_map', None) or {}
+    keys = frozenset(
+        key for key, (name, objects, type_) in result_map.items()
+        if isinstance(type_, (BLOB, CLOB))
+    )
+    binds = getattr(compiled, 'binds', None) or {}
+    streams_binds = False
+    for bind in binds.values():
+        if isinstance(bind.type, (BLOB, CLOB)):
+            streams_binds = True
+            break
+    compiled._h2_lob_usage = keys, streams_binds
+    return compiled._h2_lob_usage
+
+
+def _result_key(dialect, label):
+    """Return the result_map key for a cursor column label, matching the
+    lookup done by :class:`~sqlalchemy.engine.result.ResultMetaData`."""
+    key = dialect.normalize_name(label)
+    if not dialect.case_sensitive:
+        key = key.lower()
+    return key
+
+
+_lob_datahandler_cls = None
+
+
+def _lob_datahandler():
+    """Build the zxJDBC DataHandler that streams LOBs.
+
+    The Java classes are only subclassed on first use so that this module
+    stays importable outside Jython.
+    """
+    global _lob_datahandler_cls
+    if _lob_datahandler_cls is not None:
+        return _lob_datahandler_cls
+
+    import jarray
+    from java.io import InputStream, Reader
+    from java.lang import String, System
+    from java.sql import Types
+    from org.python.core.util import StringUtil
+    from com.ziclix.python.sql import FilterDataHandler
+
+    lob_types = (Types.BLOB, Types.CLOB, Types.NCLOB)
+
+    class LOBInputStream(InputStream):
+        def __init__(self, source):
+            self.source = source
+
+        def read(self, *args):
+            if not args:
+                data = self.source.read(1)
+                if not data:
+                    return -1
+                return ord(data)
+            b = args[0]
+            off, length = len(args) > 1 and args[1:] or (0, len(b))
+            data = self.source.read(length)
+            if not data:
+                return -1
+            System.arraycopy(StringUtil.toBytes(data), 0, b, off, len(data))
+            return len(data)
+
+    class LOBReader(Reader):
+        def __init__(self, source):
+            self.source = source
+            # text read from the source but not yet copied out; a Python
+            # character outside the BMP takes two UTF-16 units in cbuf.
+            self._pending = None
+
+        def read(self, *args):
+            if not args:
+                cbuf = jarray.zeros(1, 'c')
+                if self.read(cbuf, 0, 1) < 0:
+                    return -1
+                return ord(cbuf[0])
+            cbuf = args[0]
+            off, length = len(args) > 1 and args[1:] or (0, len(cbuf))
+            if self._pending is None:
+                data = self.source.read(length)
+                if not data:
+                    return -1
+                self._pending = String(data)
+            n = min(length, self._pending.length())
+            self._pending.getChars(0, n, cbuf, off)
+            if n < self._pending.length():
+                self._pending = self._pending.substring(n)
+            else:
+                self._pending = None
+            return n
+
+        def close(self):
+            pass
+
+    class H2LOBDataHandler(FilterDataHandler):
+        """Streams LOB cells whose result type is an H2 BLOB/CLOB and
+        LOBSource binds; everything else goes to the wrapped handler.
+
+        One instance is installed per execution, so the per-column
+        decision is cached for the single result set it reads.
+        """
+
+        def __init__(self, delegate, dialect, keys):
+            FilterDataHandler.__init__(self, delegate)
+            self.dialect = dialect
+            self.keys = keys
+            self._columns = {}
+
+        def _streams(self, set, col):
+            try:
+                return self._columns[col]
+            except KeyError:
+                label = set.getMetaData().getColumnLabel(col)
+                streams = self._columns[col] = \
+                    _result_key(self.dialect, label) in self.keys
+                return streams
+
+        def getPyObject(self, set, col, type_):
+            if type_ not in lob_types or not self._streams(set, col):
+                return FilterDataHandler.getPyObject(self, set, col, type_)
+            if type_ == Types.BLOB:
+                lob = set.getBlob(col)
+            else:
+                lob = set.getClob(col)
+            if lob is None:
+                return None
+            return H2LOBReader(lob, binary=(type_ == Types.BLOB))
+
+        def setJDBCObject(self, stmt, index, object, *type_):
+            if isinstance(object, LOBSource):
+                if isinstance(object.empty, unicode):
+                    stmt.setCharacterStream(index, LOBReader(object))
+                else:
+                    stmt.setBinaryStream(index, LOBInputStream(object))
+            else:
+                FilterDataHandler.setJDBCObject(
+                    self, stmt, index, object, *type_)
+
+    _lob_datahandler_cls = H2LOBDataHandler
+    return _lob_datahandler_cls
 
 
 class H2ExecutionContext_zxjdbc(H2ExecutionContext):
+    def pre_exec(self):
+        # only statements that select or bind H2 BLOB/CLOB types get the
+        # streaming handler; everything else keeps the default one.
+        if self.compiled is None or self.isddl:
+            return
+        keys, streams_binds = _lob_usage(self.compiled)
+        if keys or streams_binds:
+            self.cursor.datahandler = _lob_datahandler()(
+                self.cursor.datahandler, self.dialect, keys)
+
     def get_lastrowid(self):
         cursor = self.create_cursor()
-        cursor.execute("SELECT LAST_INSERT_ID()")
+        self.dialect.do_execute(cursor, "SELECT LAST_INSERT_ID()", (), self)
         lastrowid = cursor.fetchone()[0]
         cursor.close()
         if isinstance(lastrowid, long):
@@ -37,6 +369,54 @@ class H2_zxjdbc(ZxJDBCConnector, H2Dialect):
 
     execution_ctx_cls = H2ExecutionContext_zxjdbc
 
+    def __init__(self, statement_cache_size=100, **kwargs):
+        super(H2_zxjdbc, self).__init__(**kwargs)
+        statement_cache_size = int(statement_cache_size)
+        if statement_cache_size < 0:
+            raise ValueError(
+                "statement_cache_size must be >= 0, got %d" %
+                statement_cache_size)
+        self.statement_cache_size = statement_cache_size
+
+    def get_statement_cache(self, dbapi_connection):
+        """Return the :class:`.H2StatementCache` for a pooled DBAPI
+        connection, or None if statement caching is disabled."""
+        if not self.statement_cache_size:
+            return None
+        info = dbapi_connection.info
+        cache = info.get('h2_statement_cache')
+        # the connection record outlives its DBAPI connection across
+        # invalidation; statements prepared on the old one are unusable.
+        if cache is None or \
+                cache.dbapi_connection is not dbapi_connection.connection:
+            cache = info['h2_statement_cache'] = H2StatementCache(
+                dbapi_connection.connection, self.statement_cache_size)
+        return cache
+
+    def _prepared(self, cursor, statement, context):
+        if context is None:
+            return statement
+        cache = self.get_statement_cache(context._dbapi_connection)
+        if cache is None:
+            return statement
+        # compiled constructs report DDL through isddl; only plain string
+        # and text() statements need to be inspected.
+        if context.isddl or (
+                (context.compiled is None or
+                 isinstance(context.compiled.statement, expression.TextClause))
+                and DDL_RE.match(statement)):
+            cache.clear()
+            return statement
+        return cache.get(cursor, statement)
+
+    def do_execute(self, cursor, statement, parameters, context=None):
+        cursor.execute(
+            self._prepared(cursor, statement, context), parameters)
+
+    def do_executemany(self, cursor, statement, parameters, context=None):
+        cursor.executemany(
+            self._prepared(cursor, statement, context), parameters)
+
     def _create_jdbc_url(self, url):
         """Create a JDBC url from a :class:`~sqlalchemy.engine.url.URL`"""
         return 'jdbc:%s:%s;MODE=PostgreSQL' % (self.jdbc_db_name, url.database)
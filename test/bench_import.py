@@ -0,0 +1,48 @@
+"""Import-time benchmark for the H2 dialect.
+
+Times a fresh-interpreter ``import sqlalchemy_h2.dialect`` against the same
+import plus the zxjdbc connector, which is what the package loaded eagerly
+before connectors were resolved through the registry::
+
+    python test/bench_import.py [runs]
+
+"""
+import os
+import subprocess
+import sys
+
+LAZY = "import sqlalchemy_h2.dialect"
+EAGER = "import sqlalchemy_h2.dialect, sqlalchemy_h2.dialect.zxjdbc"
+
+# sqlalchemy itself is imported before the clock starts so only the cost
+# of the dialect (and connector) import is measured.
+TIMER = (
+    "import sys, time, sqlalchemy.engine.default\n"
+    "start = time.time()\n"
+    "%s\n"
+    "sys.stdout.write(repr(time.time() - start))"
+)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def best_of(code, runs):
+    best = None
+    for i in range(runs):
+        elapsed = float(subprocess.check_output(
+            [sys.executable, '-c', TIMER % code], cwd=ROOT))
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def main(runs=10):
+    lazy = best_of(LAZY, runs)
+    eager = best_of(EAGER, runs)
+    print("dialect, connector lazy:    %.2f ms" % (lazy * 1000))
+    print("dialect + zxjdbc connector: %.2f ms" % (eager * 1000))
+    print("saved:                      %.2f ms" % ((eager - lazy) * 1000))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,51 @@
+import os
+import subprocess
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _run(code):
+    proc = subprocess.Popen([sys.executable, '-c', code],
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                            cwd=ROOT)
+    out, err = proc.communicate()
+    if proc.returncode != 0:
+        raise AssertionError(err)
+    return out.decode('ascii').strip()
+
+
+class LazyImportTest(unittest.TestCase):
+    """Importing the dialect must not pull in a connector module."""
+
+    def _assert_not_loaded(self, module):
+        out = _run(
+            "import sys\n"
+            "import %s\n"
+            "print(sorted(m for m in sys.modules\n"
+            "             if m.startswith('sqlalchemy_h2.dialect.zxjdbc')\n"
+            "             or m == 'sqlalchemy.connectors.zxJDBC'))" % module
+        )
+        self.assertEqual(out, '[]')
+
+    def test_package(self):
+        self._assert_not_loaded('sqlalchemy_h2')
+
+    def test_dialect(self):
+        self._assert_not_loaded('sqlalchemy_h2.dialect')
+
+    def test_base(self):
+        self._assert_not_loaded('sqlalchemy_h2.dialect.base')
+
+    def test_registry_resolves_driver(self):
+        out = _run(
+            "import sqlalchemy_h2\n"
+            "from sqlalchemy.dialects import registry\n"
+            "print(registry.load('h2').__name__)"
+        )
+        self.assertEqual(out, 'H2_zxjdbc')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,186 @@
+import array
+import io
+import time
+import unittest
+
+from sqlalchemy import Column, Integer, LargeBinary, MetaData, Table, Text
+from sqlalchemy import select, text
+
+from sqlalchemy_h2.dialect.base import BLOB, CLOB, LOBSource
+from sqlalchemy_h2.dialect.zxjdbc import H2_zxjdbc, \
+    H2ExecutionContext_zxjdbc, _lob_usage, _result_key
+
+
+class FakeDBAPI(object):
+    paramstyle = 'qmark'
+
+    @staticmethod
+    def Binary(value):
+        return ('binary', value)
+
+
+def _chunks(*parts):
+    for part in parts:
+        yield part
+
+
+class LOBSourceTest(unittest.TestCase):
+
+    def test_file(self):
+        source = LOBSource(io.BytesIO('abcdef'))
+        self.assertEqual(source.read(4), 'abcd')
+        self.assertEqual(source.read(), 'ef')
+        self.assertEqual(source.read(), '')
+
+    def test_iterator_chunking(self):
+        source = LOBSource(_chunks('abc', '', 'de', 'fghij'))
+        self.assertEqual(source.read(2), 'ab')
+        self.assertEqual(source.read(4), 'cdef')
+        self.assertEqual(source.read(1), 'g')
+        self.assertEqual(source.read(10), 'hij')
+        self.assertEqual(source.read(10), '')
+
+    def test_iterator_read_all(self):
+        source = LOBSource(_chunks('abc', 'de'))
+        self.assertEqual(source.read(1), 'a')
+        self.assertEqual(source.read(), 'bcde')
+        self.assertEqual(source.read(), '')
+
+    def test_read_is_bounded(self):
+        big = 'x' * 1000
+        source = LOBSource(_chunks(big, big))
+        sizes = []
+        while True:
+            data = source.read(300)
+            if not data:
+                break
+            sizes.append(len(data))
+        self.assertEqual(sum(sizes), 2000)
+        self.assertEqual(max(sizes), 300)
+
+    def test_small_reads_of_large_chunk(self):
+        # each byte must be copied once; slicing off the remainder on every
+        # read made this quadratic in the chunk size
+        big = 'x' * (32 << 20)
+        source = LOBSource(_chunks(big, 'tail'))
+        start = time.time()
+        total = 0
+        while True:
+            data = source.read(8192)
+            if not data:
+                break
+            total += len(data)
+        self.assertEqual(total, len(big) + 4)
+        self.assertTrue(time.time() - start < 5)
+
+    def test_unicode(self):
+        source = LOBSource(_chunks(u'\xe9t\xe9', u'!'), empty=u'')
+        self.assertEqual(source.read(2), u'\xe9t')
+        self.assertEqual(source.read(), u'\xe9!')
+        self.assertEqual(source.read(), u'')
+        self.assertTrue(isinstance(LOBSource([], empty=u'').read(), unicode))
+
+
+class LOBTypeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dialect = H2_zxjdbc(dbapi=FakeDBAPI)
+
+    def _bind(self, type_, value):
+        return type_.bind_processor(self.dialect)(value)
+
+    def _result(self, type_, value):
+        return type_.result_processor(self.dialect, None)(value)
+
+    def test_bind_streams(self):
+        for value in [io.BytesIO('abc'), _chunks('a', 'bc'), iter(['abc'])]:
+            source = self._bind(BLOB(), value)
+            self.assertTrue(isinstance(source, LOBSource))
+            self.assertEqual(source.read(), 'abc')
+
+    def test_bind_clob_stream(self):
+        source = self._bind(CLOB(), _chunks(u'ab', u'c'))
+        self.assertTrue(isinstance(source, LOBSource))
+        self.assertEqual(source.read(), u'abc')
+
+    def test_bind_values(self):
+        binary = array.array('b', [1, 2, 3])
+        for value in ['abc', bytearray('abc'), buffer('abc'), binary]:
+            self.assertEqual(self._bind(BLOB(), value), ('binary', value))
+        self.assertEqual(self._bind(BLOB(), None), None)
+        self.assertEqual(self._bind(CLOB(), u'abc'), u'abc')
+
+    def test_result_reader_passthrough(self):
+        reader = io.BytesIO('abc')
+        self.assertTrue(self._result(BLOB(), reader) is reader)
+        self.assertEqual(self._result(BLOB(), None), None)
+
+    def test_result_wraps_plain_values(self):
+        self.assertEqual(self._result(BLOB(), 'abc').read(), 'abc')
+        self.assertEqual(self._result(CLOB(), u'abc').read(), u'abc')
+        reader = self._result(CLOB(), u'\xe9t\xe9'.encode('utf-8'))
+        self.assertEqual(reader.read(), u'\xe9t\xe9')
+
+
+class LOBUsageTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dialect = H2_zxjdbc(dbapi=FakeDBAPI)
+        metadata = MetaData()
+        self.docs = Table('docs', metadata,
+                          Column('id', Integer, primary_key=True),
+                          Column('data', BLOB),
+                          Column('body', CLOB))
+        self.plain = Table('plain', metadata,
+                           Column('id', Integer, primary_key=True),
+                           Column('data', LargeBinary),
+                           Column('body', Text))
+
+    def _usage(self, stmt):
+        return _lob_usage(stmt.compile(dialect=self.dialect))
+
+    def test_select_h2_lobs(self):
+        keys, binds = self._usage(select([self.docs]))
+        self.assertEqual(keys, frozenset(['data', 'body']))
+        self.assertFalse(binds)
+
+    def test_insert_h2_lobs(self):
+        keys, binds = self._usage(self.docs.insert())
+        self.assertEqual(keys, frozenset())
+        self.assertTrue(binds)
+
+    def test_generic_types_not_streamed(self):
+        self.assertEqual(self._usage(select([self.plain])),
+                         (frozenset(), False))
+        self.assertEqual(self._usage(self.plain.insert()),
+                         (frozenset(), False))
+        self.assertEqual(self._usage(text("SELECT data FROM docs")),
+                         (frozenset(), False))
+
+    def test_result_key(self):
+        self.assertEqual(_result_key(self.dialect, 'DATA'), 'data')
+        self.assertEqual(_result_key(self.dialect, 'MixedCase'), 'MixedCase')
+
+    def test_reflected_types_not_streamed(self):
+        self.assertFalse(issubclass(self.dialect.ischema_names['BLOB'], BLOB))
+        self.assertFalse(issubclass(self.dialect.ischema_names['CLOB'], CLOB))
+
+    def test_pre_exec_leaves_default_handler(self):
+        handler = object()
+
+        class FakeCursor(object):
+            datahandler = handler
+
+        for compiled in [None,
+                         select([self.plain]).compile(dialect=self.dialect)]:
+            context = H2ExecutionContext_zxjdbc.__new__(
+                H2ExecutionContext_zxjdbc)
+            context.compiled = compiled
+            context.isddl = False
+            context.cursor = FakeCursor()
+            context.pre_exec()
+            self.assertTrue(context.cursor.datahandler is handler)
+
+
+if __name__ == '__main__':
+    unittest.main()
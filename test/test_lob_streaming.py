@@ -0,0 +1,96 @@
+"""End-to-end LOB streaming against a file-backed H2 database.
+
+Only runs on Jython with the H2 JDBC driver on the classpath.
+"""
+import os
+import shutil
+import tempfile
+import unittest
+
+try:
+    from java.lang import Class, Runtime
+    Class.forName('org.h2.Driver')
+except Exception:
+    HAS_H2 = False
+else:
+    HAS_H2 = True
+
+
+@unittest.skipUnless(HAS_H2, "requires Jython and the H2 JDBC driver")
+class LOBStreamingTest(unittest.TestCase):
+
+    chunk = 1 << 20
+
+    def setUp(self):
+        import sqlalchemy_h2
+        from sqlalchemy import Column, Integer, MetaData, Table, \
+            create_engine
+        from sqlalchemy_h2.dialect.base import BLOB, CLOB
+
+        self.tmpdir = tempfile.mkdtemp()
+        self.engine = create_engine(
+            'h2:///%s' % os.path.join(self.tmpdir, 'lobs'))
+        metadata = MetaData()
+        self.docs = Table('docs', metadata,
+                          Column('id', Integer, primary_key=True),
+                          Column('data', BLOB),
+                          Column('body', CLOB))
+        metadata.create_all(self.engine)
+
+    def tearDown(self):
+        self.engine.dispose()
+        shutil.rmtree(self.tmpdir)
+
+    def test_blob_larger_than_heap(self):
+        from sqlalchemy import select
+        from sqlalchemy_h2.dialect.zxjdbc import H2LOBReader
+
+        # more than the JVM may ever hold, so any full materialization of
+        # the value on bind or fetch fails with an OutOfMemoryError.
+        count = Runtime.getRuntime().maxMemory() // self.chunk + 64
+        block = 'Z' * self.chunk
+
+        conn = self.engine.connect()
+        trans = conn.begin()
+        try:
+            conn.execute(self.docs.insert(), id=1,
+                         data=(block for i in xrange(count)))
+            reader = conn.execute(
+                select([self.docs.c.data]).where(self.docs.c.id == 1)
+            ).scalar()
+            self.assertTrue(isinstance(reader, H2LOBReader))
+            total = 0
+            with reader:
+                for piece in reader:
+                    self.assertTrue(len(piece) <= reader.chunk_size)
+                    total += len(piece)
+            self.assertEqual(total, count * self.chunk)
+        finally:
+            trans.rollback()
+            conn.close()
+
+    def test_clob_round_trip(self):
+        from sqlalchemy import select
+
+        # characters outside the BMP take two UTF-16 units on the JVM
+        text = u'a\U0001d11e' * 100000
+
+        conn = self.engine.connect()
+        trans = conn.begin()
+        try:
+            conn.execute(self.docs.insert(), id=2,
+                         body=(text[i:i + 4097]
+                               for i in xrange(0, len(text), 4097)))
+            reader = conn.execute(
+                select([self.docs.c.body]).where(self.docs.c.id == 2)
+            ).scalar()
+            with reader:
+                self.assertEqual(reader.read(3), text[:3])
+                self.assertEqual(reader.read(), text[3:])
+        finally:
+            trans.rollback()
+            conn.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
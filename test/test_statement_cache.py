@@ -0,0 +1,219 @@
+import time
+import unittest
+
+from sqlalchemy import literal_column, select, text
+
+from sqlalchemy_h2.dialect.zxjdbc import DDL_RE, H2StatementCache, H2_zxjdbc
+
+
+class FakeStatement(object):
+    def __init__(self, sql):
+        self.sql = sql
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakeCursor(object):
+    def __init__(self):
+        self.prepared = []
+        self.executed = []
+
+    def prepare(self, sql):
+        stmt = FakeStatement(sql)
+        self.prepared.append(stmt)
+        return stmt
+
+    def execute(self, stmt, params):
+        self.executed.append((stmt, params))
+
+    def executemany(self, stmt, params):
+        self.executed.append((stmt, params))
+
+
+class FakeFairy(object):
+    """Stands in for a pooled connection: per-record ``info`` plus the
+    raw DBAPI ``connection``."""
+
+    def __init__(self):
+        self.info = {}
+        self.connection = object()
+
+
+class FakeContext(object):
+    isddl = False
+    compiled = None
+
+    def __init__(self, fairy):
+        self._dbapi_connection = fairy
+
+
+class StatementCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cursor = FakeCursor()
+        self.cache = H2StatementCache(object(), 2)
+
+    def test_hit_and_miss(self):
+        first = self.cache.get(self.cursor, "SELECT 1")
+        second = self.cache.get(self.cursor, "SELECT 1")
+        self.assertTrue(first is second)
+        self.assertEqual(len(self.cursor.prepared), 1)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_evicts_least_recently_used(self):
+        a = self.cache.get(self.cursor, "A")
+        b = self.cache.get(self.cursor, "B")
+        self.cache.get(self.cursor, "A")
+        self.cache.get(self.cursor, "C")
+        self.assertEqual(self.cache.evictions, 1)
+        self.assertEqual(len(self.cache), 2)
+        self.assertTrue(b.closed)
+        self.assertFalse(a.closed)
+        self.assertTrue(self.cache.get(self.cursor, "A") is a)
+        self.assertEqual(self.cache.misses, 3)
+
+    def test_clear_closes_statements(self):
+        a = self.cache.get(self.cursor, "A")
+        self.cache.clear()
+        self.assertTrue(a.closed)
+        self.assertEqual(len(self.cache), 0)
+
+    def test_close_errors_ignored(self):
+        a = self.cache.get(self.cursor, "A")
+
+        def close():
+            raise RuntimeError("closed")
+        a.close = close
+        self.cache.clear()
+        self.assertEqual(len(self.cache), 0)
+
+
+class DDLMatchTest(unittest.TestCase):
+
+    def test_ddl(self):
+        for sql in [
+            "CREATE TABLE t (x INT)",
+            "  alter table t add y int",
+            "DROP INDEX ix",
+            "GRANT SELECT ON t TO u",
+            "REVOKE SELECT ON t FROM u",
+            "RUNSCRIPT FROM 'x.sql'",
+            "SET SCHEMA s",
+            "SET SCHEMA_SEARCH_PATH s",
+            "-- make a table\nCREATE TABLE t (x INT)",
+            "/* multi\nline */ DROP TABLE t",
+            "/* a */ -- b\n  TRUNCATE TABLE t",
+            "/* a ** b */ CREATE TABLE t (x INT)",
+        ]:
+            self.assertTrue(DDL_RE.match(sql), sql)
+
+    def test_not_ddl(self):
+        for sql in [
+            "SELECT * FROM created",
+            "INSERT INTO t (x) VALUES (?)",
+            "UPDATE t SET schema_name = ?",
+            "SET AUTOCOMMIT TRUE",
+            "-- CREATE TABLE t\nSELECT 1",
+            "/* DROP */ SELECT 1",
+        ]:
+            self.assertFalse(DDL_RE.match(sql), sql)
+
+    def test_leading_whitespace_is_linear(self):
+        sql = "\n" + " \n" * 20 + "SELECT 1"
+        start = time.time()
+        self.assertFalse(DDL_RE.match(sql))
+        self.assertFalse(DDL_RE.match("\n" + " " * 40 + "SELECT 1"))
+        self.assertTrue(DDL_RE.match(sql.replace("SELECT 1", "DROP TABLE t")))
+        self.assertFalse(DDL_RE.match("/* a */ " * 200 + "SELECT 1"))
+        self.assertFalse(DDL_RE.match("-- a\n" * 200 + "SELECT 1"))
+        self.assertTrue(time.time() - start < 0.1)
+
+
+class DialectStatementCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dialect = H2_zxjdbc(statement_cache_size=10)
+        self.fairy = FakeFairy()
+        self.context = FakeContext(self.fairy)
+        self.cursor = FakeCursor()
+
+    def test_execute_uses_cache(self):
+        for i in range(3):
+            self.dialect.do_execute(
+                self.cursor, "SELECT LAST_INSERT_ID()", (), self.context)
+        self.dialect.do_executemany(
+            self.cursor, "INSERT INTO t VALUES (?)", [(1,), (2,)],
+            self.context)
+        cache = self.dialect.get_statement_cache(self.fairy)
+        self.assertEqual((cache.hits, cache.misses), (2, 2))
+        stmts = [stmt for stmt, params in self.cursor.executed]
+        self.assertTrue(stmts[0] is stmts[1] is stmts[2])
+        self.assertEqual(stmts[3].sql, "INSERT INTO t VALUES (?)")
+
+    def test_ddl_invalidates(self):
+        self.dialect.do_execute(self.cursor, "SELECT 1", (), self.context)
+        stmt = self.cursor.prepared[0]
+        self.dialect.do_execute(
+            self.cursor, "/* x */ DROP TABLE t", (), self.context)
+        cache = self.dialect.get_statement_cache(self.fairy)
+        self.assertTrue(stmt.closed)
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(self.cursor.executed[-1][0], "/* x */ DROP TABLE t")
+
+    def test_compiled_ddl_invalidates(self):
+        self.dialect.do_execute(self.cursor, "SELECT 1", (), self.context)
+        self.context.isddl = True
+        self.dialect.do_execute(
+            self.cursor, "CREATE TABLE t (x INT)", (), self.context)
+        self.assertEqual(
+            len(self.dialect.get_statement_cache(self.fairy)), 0)
+
+    def test_compiled_statements_use_isddl(self):
+        # the regex is skipped for compiled constructs, so a (contrived)
+        # select whose text looks like DDL does not clear the cache
+        self.dialect.do_execute(self.cursor, "SELECT 1", (), self.context)
+        self.context.compiled = select([literal_column('1')]).compile(
+            dialect=self.dialect)
+        self.dialect.do_execute(
+            self.cursor, "CREATE TABLE t (x INT)", (), self.context)
+        self.assertEqual(
+            len(self.dialect.get_statement_cache(self.fairy)), 2)
+
+    def test_text_ddl_invalidates(self):
+        self.dialect.do_execute(self.cursor, "SELECT 1", (), self.context)
+        stmt = text("\n    DROP TABLE t\n")
+        self.context.compiled = stmt.compile(dialect=self.dialect)
+        self.dialect.do_execute(
+            self.cursor, str(self.context.compiled), (), self.context)
+        self.assertEqual(
+            len(self.dialect.get_statement_cache(self.fairy)), 0)
+
+    def test_replaced_on_reconnect(self):
+        cache = self.dialect.get_statement_cache(self.fairy)
+        self.assertTrue(self.dialect.get_statement_cache(self.fairy) is cache)
+        self.fairy.connection = object()
+        fresh = self.dialect.get_statement_cache(self.fairy)
+        self.assertFalse(fresh is cache)
+        self.assertTrue(fresh.dbapi_connection is self.fairy.connection)
+
+    def test_disabled(self):
+        dialect = H2_zxjdbc(statement_cache_size=0)
+        dialect.do_execute(self.cursor, "SELECT 1", (), self.context)
+        self.assertEqual(self.cursor.prepared, [])
+        self.assertEqual(self.cursor.executed, [("SELECT 1", ())])
+        self.assertEqual(dialect.get_statement_cache(self.fairy), None)
+
+    def test_invalid_size(self):
+        self.assertRaises(ValueError, H2_zxjdbc, statement_cache_size=-1)
+        self.assertEqual(
+            H2_zxjdbc(statement_cache_size='5').statement_cache_size, 5)
+
+    def test_no_context(self):
+        self.dialect.do_execute(self.cursor, "SELECT 1", ())
+        self.assertEqual(self.cursor.prepared, [])
+
+
+if __name__ == '__main__':
+    unittest.main()